@@ -213,11 +213,17 @@ def _geocode_location(address: str,
     return output_shape
 
 
-def _render_prompt_template(prompt_path: pathlib.Path, **prompt_vars) -> typing.Collection[typing.Dict]:
+@functools.lru_cache
+def _get_prompt_template(prompt_path: pathlib.Path) -> jinja2.Template:
+    # the prompt templates are read and compiled once, and then reused for every alert
     with open(prompt_path) as summary_template_file:
-        summary_template = jinja2.Template(
+        return jinja2.Template(
             summary_template_file.read(),
-        ).render(**prompt_vars, undefined=jinja2.StrictUndefined)
+        )
+
+
+def _render_prompt_template(prompt_path: pathlib.Path, **prompt_vars) -> typing.Collection[typing.Dict]:
+    summary_template = _get_prompt_template(prompt_path).render(**prompt_vars, undefined=jinja2.StrictUndefined)
 
     return yaml.load(summary_template, Loader=yaml.Loader)
 
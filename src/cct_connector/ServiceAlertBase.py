@@ -95,10 +95,11 @@ class ServiceAlertsBase:
         self.data = None
         self.cache_data = None
 
-    def get_data_from_minio(self, minio_read_name=None, data_size_limit=20):
+    def get_data_from_minio(self, minio_read_name=None, data_size_limit=20, columns=None):
         """
         Gets the current Service Alert data from Minio.
 
+        :param columns: Optional list of columns to read - only these (and the index) are fetched from the Parquet file
         :return: Pandas dataframe of data currently in Minio
         """
 
@@ -110,6 +111,7 @@ class ServiceAlertsBase:
             minio_key=self.minio_read_access,
             minio_secret=self.minio_read_secret,
             data_classification=self.minio_read_classification,
+            columns=columns,
         )
         if self.index_col and self.index_col in data.columns:
             data.set_index(self.index_col, inplace=True)
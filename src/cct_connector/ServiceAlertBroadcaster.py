@@ -14,12 +14,12 @@ from cct_connector import (
 )
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(frozen=True)
 class ServiceAlertOutputFileConfig:
     time_window_size: typing.Union[int, str, None]
     planned: bool
     version: str
-    columns: typing.List[str]
+    columns: typing.Tuple[str, ...]
 
     def generate_filename(self):
         time_str = f"{self.time_window_size}days" if isinstance(self.time_window_size, int) else "all"
@@ -40,13 +40,13 @@ class ServiceAlertOutputFileConfig:
         return filepath
 
 
-V0_COLS = [ID_COL, "service_area", "title", "description",
+V0_COLS = (ID_COL, "service_area", "title", "description",
            "area", "location",
            "publish_date", "effective_date", "expiry_date", "start_timestamp", "forecast_end_timestamp",
-           "planned", "request_number", ]
-V1_COLS = V0_COLS + [TWEET_COL, TOOT_COL]
-V1_1_COLS = V1_COLS + ["area_type", GEOSPATIAL_COL]
-V1_2_COLS = V1_1_COLS + ["status"]
+           "planned", "request_number", )
+V1_COLS = V0_COLS + (TWEET_COL, TOOT_COL)
+V1_1_COLS = V1_COLS + ("area_type", GEOSPATIAL_COL)
+V1_2_COLS = V1_1_COLS + ("status",)
 
 BOK_CONFIGS = [
     ServiceAlertOutputFileConfig(time_window, planned, version, version_cols)
@@ -63,12 +63,12 @@ PLANNED_COL = 'planned'
 
 
 class ServiceAlertBroadcaster(ServiceAlertBase.ServiceAlertsBase):
-    def __init__(self, minio_read_name=AUGMENTED_SA_NAME, minio_write_name=None):
+    def __init__(self, minio_read_name=AUGMENTED_SA_NAME, minio_write_name=None, columns=None):
         super().__init__(None, None, minio_utils.DataClassification.LAKE,
                          minio_read_name=minio_read_name, minio_write_name=minio_write_name,
                          use_cached_values=False)
 
-        self.data = self.get_data_from_minio()
+        self.data = self.get_data_from_minio(columns=columns)
 
         if ID_COL in self.data.columns:
             self.data.drop(columns=[ID_COL], inplace=True)
@@ -92,7 +92,7 @@ class ServiceAlertBroadcaster(ServiceAlertBase.ServiceAlertsBase):
             # Planned vs Unplanned
             filtered_df = filtered_df.query(f"{PLANNED_COL} == {bok_config.planned}")
 
-            output_df = filtered_df[bok_config.columns]
+            output_df = filtered_df[list(bok_config.columns)]
             logging.debug(f"{output_df.shape=}")
 
             yield bok_config.generate_filename(), output_df
@@ -1,15 +1,19 @@
+import concurrent.futures
 import dataclasses
 import functools
 import hashlib
 import itertools
 import logging
 import pathlib
+import re
 import tempfile
 import typing
 import uuid
 
 from db_utils import exchange_utils, minio_utils, proxy_utils, secrets_utils
-from exchangelib import HTMLBody, FileAttachment, Message
+from exchangelib import Account, HTMLBody, FileAttachment, Message
+from exchangelib.items import SEND_AND_SAVE_COPY
+from exchangelib.version import EXCHANGE_2013
 import jinja2
 import pandas
 import requests
@@ -18,7 +22,9 @@ from cct_connector import (
     TWEET_COL, IMAGE_COL,
     SA_EMAIL_NAME
 )
-from cct_connector.ServiceAlertBroadcaster import ServiceAlertOutputFileConfig, ServiceAlertBroadcaster, V0_COLS, ID_COL
+from cct_connector.ServiceAlertBroadcaster import (
+    ServiceAlertOutputFileConfig, ServiceAlertBroadcaster, V0_COLS, ID_COL, EXPIRY_COL
+)
 
 DS_REPLY_TO = (
     "gordon.inggs@capetown.gov.za",
@@ -34,24 +40,42 @@ LINK_TEMPLATE = "https://ctapps.capetown.gov.za/sites/crhub/SitePages/ViewServic
 AREA_IMAGE_FILENAME = "area_image_filename.png"
 IMAGE_LINK_TEMPLATE = "https://lake.capetown.gov.za/service-alerts.maps/{image_filename}"
 EMAIL_LINK_TEMPLATE = "https://lake.capetown.gov.za/service-alerts.service-alerts-emails/{email_filename}"
+EMAIL_WORKERS = 16
+ALERT_WORKERS = 8
+# NB kept small, as a batch's emails are only backed up once the whole batch has been sent, so a failure part way
+#    through can mean re-sending up to a batch of emails on the next run
+EMAIL_BATCH_SIZE = 10
+IMAGE_FETCH_TIMEOUT = 10
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(frozen=True)
 class ServiceAlertEmailConfig(ServiceAlertOutputFileConfig):
     receivers: typing.Tuple[typing.Tuple[str or None, str], ...]
     email_focus: str
     additional_filter: str or typing.Callable or None
 
-    def apply_additional_filter(self, data_df: pandas.DataFrame) -> pandas.DataFrame:
+    @functools.cached_property
+    def config_hash(self) -> str:
+        # NB this hash is part of the filenames of the emails sent for this config, so it needs to be stable
+        return hashlib.sha256(str.encode(str(self.receivers) +
+                                         str(self.email_focus))).hexdigest()
+
+    def apply_additional_filter(self, data_df: pandas.DataFrame,
+                                ward_index: typing.Dict[str, pandas.Index] or None = None) -> pandas.DataFrame:
         logging.debug(f"( pre-filter) {data_df.shape=}")
         filtered_df = data_df.copy()
 
         if isinstance(self.additional_filter, str):
             logging.debug("Applying query")
             filtered_df = data_df.query(self.additional_filter).copy()
-        if isinstance(self.additional_filter, typing.Callable):
+        elif isinstance(self.additional_filter, WardPredicate) and ward_index is not None:
+            logging.debug("Using ward index")
             filtered_df = data_df.loc[
-                data_df.apply(self.additional_filter, axis=1)
+                data_df.index.isin(ward_index.get(self.additional_filter.ward, []))
+            ].copy()
+        elif isinstance(self.additional_filter, typing.Callable):
+            filtered_df = data_df.loc[
+                self.additional_filter(data_df)
             ].copy()
 
         logging.debug(f"(post filter) {filtered_df.shape=}")
@@ -59,30 +83,134 @@ class ServiceAlertEmailConfig(ServiceAlertOutputFileConfig):
         return filtered_df
 
 
-EMAIL_COLS = [ID_COL, "service_area", "title", "description", "status",
+EMAIL_COLS = (ID_COL, "service_area", "title", "description", "status",
               "area_type", "area", "location",
               "inferred_wards", "inferred_suburbs", IMAGE_COL,
               "start_timestamp", "forecast_end_timestamp",
-              "planned", "request_number", TWEET_COL]
+              "planned", "request_number", TWEET_COL)
+
+
+@dataclasses.dataclass(frozen=True)
+class WardPredicate:
+    ward: str
+
+    def __call__(self, data_df: pandas.DataFrame) -> pandas.Series:
+        # NB inferred_wards is a list of ward names, so this is an exact membership test (i.e. "3" does not match "31"),
+        #    and there is no need for a ward pattern
+        return data_df["inferred_wards"].explode().eq(self.ward).groupby(level=0).any()
+
+
+@dataclasses.dataclass(frozen=True)
+class ServiceAreaPredicate:
+    service_area: str
 
+    def __call__(self, data_df: pandas.DataFrame) -> pandas.Series:
+        return data_df["service_area"] == self.service_area
 
-def _ward_curry_pot(ward_number: str) -> typing.Callable[[pandas.Series], bool]:
-    # creating curried filter function
-    def _ward_filter(row: pandas.Series) -> bool:
-        return (row["inferred_wards"] is not None and
-                ward_number in row["inferred_wards"])
 
-    return _ward_filter
+def _contains_pattern(values: pandas.Series, pattern: str) -> pandas.Series:
+    # there are far fewer distinct values than rows, so the pattern is only matched against each distinct value once
+    values = values.astype(str)
+    unique_values = pandas.Series(values.unique())
+    matching_values = unique_values[unique_values.str.contains(pattern, flags=re.IGNORECASE)]
 
+    return values.isin(matching_values)
 
-def _service_area_curry_pot(service_area: str) -> typing.Callable[[pandas.Series], bool]:
-    # creating curried filter function
-    def _service_area_filter(row: pandas.Series) -> bool:
-        return (row["service_area"] is not None and
-                service_area == row["service_area"])
 
-    return _service_area_filter
+@dataclasses.dataclass(frozen=True)
+class SuburbPredicate:
+    suburb_pattern: str
+    exclude_citywide: bool = False
 
+    def __call__(self, data_df: pandas.DataFrame) -> pandas.Series:
+        # matching against either any of the inferred suburbs, or the area
+        suburb_mask = (
+            _contains_pattern(data_df["inferred_suburbs"].explode(), self.suburb_pattern).groupby(level=0).any() |
+            _contains_pattern(data_df["area"], self.suburb_pattern)
+        )
+        if self.exclude_citywide:
+            suburb_mask &= data_df["area_type"] != "Citywide"
+
+        return suburb_mask
+
+
+def _partition_key(config: ServiceAlertEmailConfig) -> typing.Tuple:
+    # the parts of the config that determine which alerts it starts from, before the additional filter
+    return config.time_window_size, config.planned, config.columns
+
+
+def _precompute_ward_index(alert_df: pandas.DataFrame) -> typing.Dict[str, pandas.Index]:
+    # mapping from each ward to the index of the alerts that might affect it, so that the ward configs don't each have
+    # to go through every alert's wards
+    alert_wards = alert_df["inferred_wards"].explode().dropna()
+    ward_index = alert_wards.index.groupby(alert_wards.values)
+    logging.debug(f"{len(ward_index)=}")
+
+    return ward_index
+
+
+# ward number, councillor and their email address
+WARD_COUNCILLORS = (
+    ("3", "Cllr Van Zyl", "annelize.vanZyl@capetown.gov.za"),
+    ("16", "Cllr Barends", "ursula.barends@capetown.gov.za"),
+    ("21", "Cllr Terblanche", "hendri.terblanche@capetown.gov.za"),
+    ("31", "Ald Thompson", "theresa.thompson@capetown.gov.za"),
+    ("33", "Cllr Somdaka", "Lungisa.Somdaka@capetown.gov.za"),
+    ("34", "Cllr Gadeni", "Melikhaya.Gadeni@capetown.gov.za"),
+    ("35", "Cllr Chitha", "Mboniswa.Chitha@capetown.gov.za"),
+    ("36", "Cllr Ntshweza", "Nceba.Ntshweza@capetown.gov.za"),
+    ("37", "Cllr Martin", "Lionel.Martin@capetown.gov.za"),
+    ("38", "Cllr Zumana", "Suzanne.Zumana@capetown.gov.za"),
+    ("39", "Cllr Mjuza", "Thembinkosi.Mjuza@capetown.gov.za"),
+    ("40", "Cllr Ngcombolo", "bongani.ngcombolo@capetown.gov.za"),
+    ("41", "Cllr Sonyoka", "Lindile.Sonyoka@capetown.gov.za"),
+    ("42", "Cllr Esau", "Charles.Esau@capetown.gov.za"),
+    ("43", "Cllr Jansen", "EltonEnrique.Jansen@capetown.gov.za"),
+    ("44", "Cllr Moses", "Anthony.Moses@capetown.gov.za"),
+    ("45", "Cllr Marr", "Mandy.Marr@capetown.gov.za"),
+    ("47", "Ald van der Rheede", "Antonio.VanDerRheede@capetown.gov.za"),
+    ("50", "Cllr McKenzie", "angus.mckenzie@capetown.gov.za"),
+    ("52", "Cllr Nyamakazi", "Thembelani.Nyamakazi@capetown.gov.za"),
+    ("54", "Cllr Jowell", "nicola.jowell@capetown.gov.za"),
+    ("57", "Cllr Mohamed", "Yusuf.Mohamed@capetown.gov.za"),
+    ("58", "Cllr Hill", "Richard.Hill@capetown.gov.za"),
+    ("59", "Cllr Manuel", "Mikhail.Manuel@capetown.gov.za"),
+    ("60", "Cllr Kleinschmidt", "mark.kleinschmidt@capetown.gov.za"),
+    ("61", "Cllr Liell-Cock", "Simon.LiellCock@capetown.gov.za"),
+    ("62", "Cllr Langenhoven", "Emile.Langenhoven@capetown.gov.za"),
+    ("63", "Cllr Siebritz", "Carmen.Siebritz@capetown.gov.za"),
+    ("64", "Cllr Sherry", "Izabel.Sherry@capetown.gov.za"),
+    ("65", "Cllr Nelson", "Donovan.Nelson@capetown.gov.za"),
+    ("66", "Cllr Akim", "william.akim@capetown.gov.za"),
+    ("67", "Cllr Gordon", "Gerry.Gordon@capetown.gov.za"),
+    ("68", "Cllr Petersen", "marita.petersen@capetown.gov.za"),
+    ("69", "Cllr Francke", "Patricia.Francke@capetown.gov.za"),
+    ("71", "Cllr Franklin", "Carolynne.Franklin@capetown.gov.za"),
+    ("72", "Cllr Southgate", "Kevin.Southgate@capetown.gov.za"),
+    ("73", "Ald Andrews", "Eddie.Andrews@capetown.gov.za"),
+    ("74", "Cllr Quintas", "roberto.quintas@capetown.gov.za"),
+    ("75", "Cllr Woodman", "joan.woodman@capetown.gov.za"),
+    ("76", "Cllr Plaatjies", "Avron.Plaatjies@capetown.gov.za"),
+    ("77", "Cllr Higham", "Francine.Higham@capetown.gov.za"),
+    ("78", "Cllr Timm", "Goawa.Timm@capetown.gov.za"),
+    ("79", "Cllr Christians", "Daniel.Christians@capetown.gov.za"),
+    ("80", "Cllr Payiya", "Bennet.Payiya@capetown.gov.za"),
+    ("81", "Cllr Potts", "Ashley.Potts@capetown.gov.za"),
+    ("82", "Cllr Harris", "Washiela.Harris@capetown.gov.za"),
+    ("88", "Cllr Sophazi", "Zukisani.Sophazi@capetown.gov.za"),
+    ("90", "Cllr Simangweni", "Lukhanyo.Simangweni@capetown.gov.za"),
+    ("92", "Cllr Adonis", "Norman.Adonis@capetown.gov.za"),
+    ("99", "Cllr Mqina", "Lonwabo.Mqina@capetown.gov.za"),
+    ("110", "Ald Rossouw", "shanen.rossouw@capetown.gov.za"),
+    ("115", "Cllr McMahon", "Ian.McMahon@capetown.gov.za"),
+    ("116", "Cllr Philander", "Solomon.Philander@capetown.gov.za"),
+)
+# wards whose planned works emails go somewhere other than the councillor's address
+# NB changing the receivers changes the config hash, and so re-sends every current alert, so these need to be changed
+#    deliberately
+WARD_PLANNED_EMAIL_OVERRIDES = {
+    "52": "angus.mckenzie@capetown.gov.za",
+}
 
 SA_EMAIL_CONFIGS = [
     # All Alerts
@@ -109,544 +237,63 @@ SA_EMAIL_CONFIGS = [
                             (("Mary-Ann", "MaryAnn.FransmanJohannes@capetown.gov.za"),
                              ("Electricity Maintenance Team", "ElectricityMaintenance.Outages@capetown.gov.za"),),
                             "all planned electricity work",
-                            _service_area_curry_pot("Electricity")),
+                            ServiceAreaPredicate("Electricity")),
     ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
                             (("Liza", "Elizabeth.Laubscher@capetown.gov.za"),
                              ("Jean-Marie", "JeanMarie.deWaal@capetown.gov.za"),
                              ("Michelle", "MichelleMargaret.Jones@capetown.gov.za"),
                              ("Aidan", "AidanKarl.vandenHeever@capetown.gov.za"),),
                             "all unplanned electricity alerts",
-                            _service_area_curry_pot("Electricity")),
+                            ServiceAreaPredicate("Electricity")),
     ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
                             (("Liza", "Elizabeth.Laubscher@capetown.gov.za"),
                              ("Jean-Marie", "JeanMarie.deWaal@capetown.gov.za"),
                              ("Michelle", "MichelleMargaret.Jones@capetown.gov.za"),
                              ("Aidan", "AidanKarl.vandenHeever@capetown.gov.za"),),
                             "all planned electricity alerts",
-                            _service_area_curry_pot("Electricity")),
+                            ServiceAreaPredicate("Electricity")),
     # Water-specific
     ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
                             (("Melissa", "Melissa.DeSousaAlves@capetown.gov.za"),
                              ("Water Dispatch Team", "Water.SanitationDispatch@capetown.gov.za"),),
                             "all planned water and sanitation work",
-                            _service_area_curry_pot("Water & Sanitation")),
+                            ServiceAreaPredicate("Water & Sanitation")),
     ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
                             (("Melissa", "Melissa.DeSousaAlves@capetown.gov.za"),
                              ("Water Dispatch Team", "Water.SanitationDispatch@capetown.gov.za"),),
                             "all unplanned water and sanitation alerts",
-                            _service_area_curry_pot("Water & Sanitation")),
+                            ServiceAreaPredicate("Water & Sanitation")),
     # Wards
-    # Ward 3
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Van Zyl", "annelize.vanZyl@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 3",
-                            _ward_curry_pot("3")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Van Zyl", "annelize.vanZyl@capetown.gov.za"),),
-                            "all planned works that might affect Ward 3",
-                            _ward_curry_pot("3")),
-    # Ward 16
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Barends", "ursula.barends@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 16",
-                            _ward_curry_pot("16")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Barends", "ursula.barends@capetown.gov.za"),),
-                            "all planned works that might affect Ward 16",
-                            _ward_curry_pot("16")),
-    # Ward 21
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Terblanche", "hendri.terblanche@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 21",
-                            _ward_curry_pot("21")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Terblanche", "hendri.terblanche@capetown.gov.za"),),
-                            "all planned works that might affect Ward 21",
-                            _ward_curry_pot("21")),
-    # Ward 31
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Ald Thompson", "theresa.thompson@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 31",
-                            _ward_curry_pot("31")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Ald Thompson", "theresa.thompson@capetown.gov.za"),),
-                            "all planned works that might affect Ward 31",
-                            _ward_curry_pot("31")),
-    # Ward 33
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Somdaka", "Lungisa.Somdaka@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 33",
-                            _ward_curry_pot("33")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Somdaka", "Lungisa.Somdaka@capetown.gov.za"),),
-                            "all planned works that might affect Ward 33",
-                            _ward_curry_pot("33")),
-    # Ward 34
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Gadeni", "Melikhaya.Gadeni@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 34",
-                            _ward_curry_pot("34")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Gadeni", "Melikhaya.Gadeni@capetown.gov.za"),),
-                            "all planned works that might affect Ward 34",
-                            _ward_curry_pot("34")),
-    # Ward 35
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Chitha", "Mboniswa.Chitha@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 35",
-                            _ward_curry_pot("35")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Chitha", "Mboniswa.Chitha@capetown.gov.za"),),
-                            "all planned works that might affect Ward 35",
-                            _ward_curry_pot("35")),
-    # Ward 36
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Ntshweza", "Nceba.Ntshweza@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 36",
-                            _ward_curry_pot("36")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Ntshweza", "Nceba.Ntshweza@capetown.gov.za"),),
-                            "all planned works that might affect Ward 36",
-                            _ward_curry_pot("36")),
-    # Ward 37
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Martin", "Lionel.Martin@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 37",
-                            _ward_curry_pot("37")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Martin", "Lionel.Martin@capetown.gov.za"),),
-                            "all planned works that might affect Ward 37",
-                            _ward_curry_pot("37")),
-    # Ward 38
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Zumana", "Suzanne.Zumana@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 38",
-                            _ward_curry_pot("38")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Zumana", "Suzanne.Zumana@capetown.gov.za"),),
-                            "all planned works that might affect Ward 38",
-                            _ward_curry_pot("38")),
-    # Ward 39
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Mjuza", "Thembinkosi.Mjuza@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 39",
-                            _ward_curry_pot("39")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Mjuza", "Thembinkosi.Mjuza@capetown.gov.za"),),
-                            "all planned works that might affect Ward 39",
-                            _ward_curry_pot("39")),
-    # Ward 40
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Ngcombolo", "bongani.ngcombolo@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 40",
-                            _ward_curry_pot("40")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Ngcombolo", "bongani.ngcombolo@capetown.gov.za"),),
-                            "all planned works that might affect Ward 40",
-                            _ward_curry_pot("40")),
-    # Ward 41
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Sonyoka", "Lindile.Sonyoka@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 41",
-                            _ward_curry_pot("41")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Sonyoka", "Lindile.Sonyoka@capetown.gov.za"),),
-                            "all planned works that might affect Ward 41",
-                            _ward_curry_pot("41")),
-    # Ward 42
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Esau", "Charles.Esau@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 42",
-                            _ward_curry_pot("42")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Esau", "Charles.Esau@capetown.gov.za"),),
-                            "all planned works that might affect Ward 42",
-                            _ward_curry_pot("42")),
-    # Ward 43
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Jansen", "EltonEnrique.Jansen@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 43",
-                            _ward_curry_pot("43")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Jansen", "EltonEnrique.Jansen@capetown.gov.za"),),
-                            "all planned works that might affect Ward 43",
-                            _ward_curry_pot("43")),
-    # Ward 44
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Moses", "Anthony.Moses@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 44",
-                            _ward_curry_pot("44")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Moses", "Anthony.Moses@capetown.gov.za"),),
-                            "all planned works that might affect Ward 44",
-                            _ward_curry_pot("44")),
-    # Ward 45
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Marr", "Mandy.Marr@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 45",
-                            _ward_curry_pot("45")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Marr", "Mandy.Marr@capetown.gov.za"),),
-                            "all planned works that might affect Ward 45",
-                            _ward_curry_pot("45")),
-    # Ward 47
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Ald van der Rheede", "Antonio.VanDerRheede@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 47",
-                            _ward_curry_pot("47")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Ald van der Rheede", "Antonio.VanDerRheede@capetown.gov.za"),),
-                            "all planned works that might affect Ward 47",
-                            _ward_curry_pot("47")),
-    # Ward 50
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr McKenzie", "angus.mckenzie@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 50",
-                            _ward_curry_pot("50")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr McKenzie", "angus.mckenzie@capetown.gov.za"),),
-                            "all planned works that might affect Ward 50",
-                            _ward_curry_pot("50")),
-    # Ward 52
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Nyamakazi", "Thembelani.Nyamakazi@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 52",
-                            _ward_curry_pot("52")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Nyamakazi", "angus.mckenzie@capetown.gov.za"),),
-                            "all planned works that might affect Ward 52",
-                            _ward_curry_pot("52")),
-    # Ward 54
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Jowell", "nicola.jowell@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 54",
-                            _ward_curry_pot("54")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Jowell", "nicola.jowell@capetown.gov.za"),),
-                            "all planned works that might affect Ward 54",
-                            _ward_curry_pot("54")),
-    # Ward 57
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Mohamed", "Yusuf.Mohamed@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 57",
-                            _ward_curry_pot("57")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Mohamed", "Yusuf.Mohamed@capetown.gov.za"),),
-                            "all planned works that might affect Ward 57",
-                            _ward_curry_pot("57")),
-    # Ward 58
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Hill", "Richard.Hill@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 58",
-                            _ward_curry_pot("58")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Hill", "Richard.Hill@capetown.gov.za"),),
-                            "all planned works that might affect Ward 58",
-                            _ward_curry_pot("58")),
-    # Ward 59
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Manuel", "Mikhail.Manuel@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 59",
-                            _ward_curry_pot("59")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Manuel", "Mikhail.Manuel@capetown.gov.za"),),
-                            "all planned works that might affect Ward 59",
-                            _ward_curry_pot("59")),
-    # Ward 60
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Kleinschmidt", "mark.kleinschmidt@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 60",
-                            _ward_curry_pot("60")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Kleinschmidt", "mark.kleinschmidt@capetown.gov.za"),),
-                            "all planned works that might affect Ward 60",
-                            _ward_curry_pot("60")),
-    # Ward 61
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Liell-Cock", "Simon.LiellCock@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 61",
-                            _ward_curry_pot("61")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Liell-Cock", "Simon.LiellCock@capetown.gov.za"),),
-                            "all planned works that might affect Ward 61",
-                            _ward_curry_pot("61")),
-    # Ward 62
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Langenhoven", "Emile.Langenhoven@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 62",
-                            _ward_curry_pot("62")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Langenhoven", "Emile.Langenhoven@capetown.gov.za"),),
-                            "all planned works that might affect Ward 62",
-                            _ward_curry_pot("62")),
-    # Ward 63
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Siebritz", "Carmen.Siebritz@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 63",
-                            _ward_curry_pot("63")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Siebritz", "Carmen.Siebritz@capetown.gov.za"),),
-                            "all planned works that might affect Ward 63",
-                            _ward_curry_pot("63")),
-    # Ward 64
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Sherry", "Izabel.Sherry@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 64",
-                            _ward_curry_pot("64")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Sherry", "Izabel.Sherry@capetown.gov.za"),),
-                            "all planned works that might affect Ward 64",
-                            _ward_curry_pot("64")),
-    # Ward 65
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Nelson", "Donovan.Nelson@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 65",
-                            _ward_curry_pot("65")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Nelson", "Donovan.Nelson@capetown.gov.za"),),
-                            "all planned works that might affect Ward 65",
-                            _ward_curry_pot("65")),
-    # Ward 66
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Akim", "william.akim@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 66",
-                            _ward_curry_pot("66")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Akim", "william.akim@capetown.gov.za"),),
-                            "all planned works that might affect Ward 66",
-                            _ward_curry_pot("66")),
-    # Ward 67
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Gordon", "Gerry.Gordon@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 67",
-                            _ward_curry_pot("67")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Gordon", "Gerry.Gordon@capetown.gov.za"),),
-                            "all planned works that might affect Ward 67",
-                            _ward_curry_pot("67")),
-    # Ward 68
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Petersen", "marita.petersen@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 68",
-                            _ward_curry_pot("68")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Petersen", "marita.petersen@capetown.gov.za"),),
-                            "all planned works that might affect Ward 68",
-                            _ward_curry_pot("68")),
-    # Ward 69
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Francke", "Patricia.Francke@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 69",
-                            _ward_curry_pot("69")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Francke", "Patricia.Francke@capetown.gov.za"),),
-                            "all planned works that might affect Ward 69",
-                            _ward_curry_pot("69")),
-    # Ward 71
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Franklin", "Carolynne.Franklin@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 71",
-                            _ward_curry_pot("71")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Franklin", "Carolynne.Franklin@capetown.gov.za"),),
-                            "all planned works that might affect Ward 71",
-                            _ward_curry_pot("71")),
-    # Ward 72
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Southgate", "Kevin.Southgate@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 72",
-                            _ward_curry_pot("72")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Southgate", "Kevin.Southgate@capetown.gov.za"),),
-                            "all planned works that might affect Ward 72",
-                            _ward_curry_pot("72")),
-    # Ward 73
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Ald Andrews", "Eddie.Andrews@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 73",
-                            _ward_curry_pot("73")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Ald Andrews", "Eddie.Andrews@capetown.gov.za"),),
-                            "all planned works that might affect Ward 73",
-                            _ward_curry_pot("73")),
-    # Ward 74
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Quintas", "roberto.quintas@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 74",
-                            _ward_curry_pot("74")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Quintas", "roberto.quintas@capetown.gov.za"),),
-                            "all planned works that might affect Ward 74",
-                            _ward_curry_pot("74")),
-    # Ward 75
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Woodman", "joan.woodman@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 75",
-                            _ward_curry_pot("75")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Woodman", "joan.woodman@capetown.gov.za"),),
-                            "all planned works that might affect Ward 75",
-                            _ward_curry_pot("75")),
-    # Ward 76
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Plaatjies", "Avron.Plaatjies@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 76",
-                            _ward_curry_pot("76")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Plaatjies", "Avron.Plaatjies@capetown.gov.za"),),
-                            "all planned works that might affect Ward 76",
-                            _ward_curry_pot("76")),
-    # Ward 77
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Higham", "Francine.Higham@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 77",
-                            _ward_curry_pot("77")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Higham", "Francine.Higham@capetown.gov.za"),),
-                            "all planned works that might affect Ward 77",
-                            _ward_curry_pot("77")),
-    # Ward 78
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Timm", "Goawa.Timm@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 78",
-                            _ward_curry_pot("78")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Timm", "Goawa.Timm@capetown.gov.za"),),
-                            "all planned works that might affect Ward 78",
-                            _ward_curry_pot("78")),
-    # Ward 79
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Christians", "Daniel.Christians@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 79",
-                            _ward_curry_pot("79")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Christians", "Daniel.Christians@capetown.gov.za"),),
-                            "all planned works that might affect Ward 79",
-                            _ward_curry_pot("79")),
-    # Ward 80
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Payiya", "Bennet.Payiya@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 80",
-                            _ward_curry_pot("80")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Payiya", "Bennet.Payiya@capetown.gov.za"),),
-                            "all planned works that might affect Ward 80",
-                            _ward_curry_pot("80")),
-    # Ward 81
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Potts", "Ashley.Potts@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 81",
-                            _ward_curry_pot("81")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Potts", "Ashley.Potts@capetown.gov.za"),),
-                            "all planned works that might affect Ward 81",
-                            _ward_curry_pot("81")),
-
-    # Ward 82
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Harris", "Washiela.Harris@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 82",
-                            _ward_curry_pot("82")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Harris", "Washiela.Harris@capetown.gov.za"),),
-                            "all planned works that might affect Ward 82",
-                            _ward_curry_pot("82")),
-
-    # Ward 88
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Sophazi", "Zukisani.Sophazi@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 88",
-                            _ward_curry_pot("88")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Sophazi", "Zukisani.Sophazi@capetown.gov.za"),),
-                            "all planned works that might affect Ward 88",
-                            _ward_curry_pot("88")),
-
-    # Ward 90
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Simangweni", "Lukhanyo.Simangweni@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 90",
-                            _ward_curry_pot("90")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Simangweni", "Lukhanyo.Simangweni@capetown.gov.za"),),
-                            "all planned works that might affect Ward 90",
-                            _ward_curry_pot("90")),
-
-    # Ward 92
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Adonis", "Norman.Adonis@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 92",
-                            _ward_curry_pot("92")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Adonis", "Norman.Adonis@capetown.gov.za"),),
-                            "all planned works that might affect Ward 92",
-                            _ward_curry_pot("92")),
-
-    # Ward 99
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Mqina", "Lonwabo.Mqina@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 99",
-                            _ward_curry_pot("99")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Mqina", "Lonwabo.Mqina@capetown.gov.za"),),
-                            "all planned works that might affect Ward 99",
-                            _ward_curry_pot("99")),
-
-    # Ward 110
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Ald Rossouw", "shanen.rossouw@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 110",
-                            _ward_curry_pot("110")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Ald Rossouw", "shanen.rossouw@capetown.gov.za"),),
-                            "all planned works that might affect Ward 110",
-                            _ward_curry_pot("110")),
-
-    # Ward 115
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr McMahon", "Ian.McMahon@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 115",
-                            _ward_curry_pot("115")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr McMahon", "Ian.McMahon@capetown.gov.za"),),
-                            "all planned works that might affect Ward 115",
-                            _ward_curry_pot("115")),
-
-    # Ward 116
-    ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
-                            (("Cllr Philander", "Solomon.Philander@capetown.gov.za"),),
-                            "all unplanned alerts that might affect Ward 116",
-                            _ward_curry_pot("116")),
-    ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
-                            (("Cllr Philander", "Solomon.Philander@capetown.gov.za"),),
-                            "all planned works that might affect Ward 116",
-                            _ward_curry_pot("116")),
+    *(
+        ServiceAlertEmailConfig("current", planned, "v1", EMAIL_COLS,
+                                ((councillor,
+                                  WARD_PLANNED_EMAIL_OVERRIDES.get(ward, councillor_email) if planned
+                                  else councillor_email),),
+                                f"all {'planned works' if planned else 'unplanned alerts'} that might affect Ward {ward}",
+                                WardPredicate(ward))
+        for ward, councillor, councillor_email in WARD_COUNCILLORS
+        for planned in (False, True)
+    ),
 
     # Grassy Park
     ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
                             (("Rejane", "rejane.alexander@capetown.gov.za"),),
                             "all unplanned alerts that affect Grassy Park",
-                            "(inferred_suburbs.astype('str').str.lower().str.contains('grassy\Wpark') or "
-                            " area.astype('str').str.lower().str.contains('grassy\Wpark'))"),
+                            SuburbPredicate(r"grassy\Wpark")),
     ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
                             (("Rejane", "rejane.alexander@capetown.gov.za"),),
                             "all planned works that affect Grassy Park",
-                            "(inferred_suburbs.astype('str').str.lower().str.contains('grassy\Wpark') or "
-                            " area.astype('str').str.lower().str.contains('grassy\Wpark'))"),
+                            SuburbPredicate(r"grassy\Wpark")),
 
     # Somerset West
     ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
                             (("Delyno", "delyno.dutoit@capetown.gov.za"),),
                             "all unplanned alerts that affect Somerset West",
-                            "(inferred_suburbs.astype('str').str.lower().str.contains('somerset\Wwest') or "
-                            " area.astype('str').str.lower().str.contains('somerset\Wwest')) and "
-                            "area_type != 'Citywide'"),
+                            SuburbPredicate(r"somerset\Wwest", exclude_citywide=True)),
     ServiceAlertEmailConfig("current", True, "v1", EMAIL_COLS,
                             (("Delyno", "delyno.dutoit@capetown.gov.za"),),
                             "all planned works that affect Somerset West",
-                            "(inferred_suburbs.astype('str').str.lower().str.contains('somerset\Wwest') or "
-                            " area.astype('str').str.lower().str.contains('somerset\Wwest')) and "
-                            "area_type != 'Citywide'"),
+                            SuburbPredicate(r"somerset\Wwest", exclude_citywide=True)),
     # Citywide
     ServiceAlertEmailConfig("current", False, "v1", EMAIL_COLS,
                             (("Gordon", "gordon.inggs@capetown.gov.za"),
@@ -661,160 +308,318 @@ SA_EMAIL_CONFIGS = [
 ]
 
 
-@functools.lru_cache()
-def _get_image_attachment(image_path: pathlib.Path, attachment_name: str) -> FileAttachment:
-    with open(image_path, "rb") as image_file:
-        logo_attachment = FileAttachment(name=attachment_name, content=image_file.read(), is_inline=True)
-
-    return logo_attachment
-
-
-def _form_and_send_alerts_email(alert_dict: typing.Dict[str, typing.Any],
-                                email_focus: str,
-                                email_filename: str,
-                                recipients: typing.Tuple[typing.Tuple[str, str]],
-                                http_session: requests.Session) -> str:
-    secrets = secrets_utils.get_secrets()
-
-    with proxy_utils.set_env_http_proxy():
-        account = exchange_utils.setup_exchange_account(secrets["proxy"]["username"],
-                                                        secrets["proxy"]["password"], )
-
-        # Forming email message
-        if alert_dict.get("status", "Open")  == "Open":
-            email_subject = f"Service Alert - {alert_dict['title']} in {alert_dict['area']}"
-        else:
-            email_subject = f"Updated Service Alert - {alert_dict['title']} in {alert_dict['area']}"
-
-        email_request_id = str(uuid.uuid4())
-        email_date = pandas.Timestamp.now().isoformat()
-        suggested_post = alert_dict[TWEET_COL]
-        link_str = LINK_TEMPLATE.format(alert_id=alert_dict[ID_COL])
-        image_link_str = (
-            IMAGE_LINK_TEMPLATE.format(image_filename=alert_dict[IMAGE_COL])
-            if alert_dict[IMAGE_COL] is not None
-            else None
-        )
-
-        # removing null fields and tweet col for email generation
-        fields_to_delete = [TWEET_COL, IMAGE_COL]
-        for k, v in alert_dict.items():
-            if not isinstance(v, typing.Collection) and pandas.isna(v):
-                fields_to_delete += [k]
-            elif isinstance(v, typing.Collection) and all(map(pandas.isna, v)):
-                fields_to_delete += [k]
-
-        if alert_dict["area_type"] == "Official Planning Suburb":
-            fields_to_delete += ["inferred_suburbs"]
-        elif alert_dict["area_type"] == "Citywide":
-            fields_to_delete += ["inferred_suburbs", "inferred_wards"]
-
-        for k in fields_to_delete:
-            if k in alert_dict:
-                del alert_dict[k]
-
-        # formatting array fields
-        for k, v in alert_dict.items():
-            if isinstance(v, typing.Collection) and not isinstance(v, str):
-                alert_dict[k] = ", ".join(v)
-
-        logging.debug(f"{email_subject=}, {email_request_id=}, {email_date=}")
-
-        logging.debug("Forming email body")
-        with open(RESOURCES_PATH / ALERT_EMAIL_TEMPLATE, 'r') as template_file:
-            message_body = jinja2.Template(template_file.read()).render(
-                email_subject=email_subject,
-                recipients=[name for name, _ in recipients if name],
-                alert_dict=alert_dict,
-                post_text=suggested_post,
-                email_focus=email_focus,
-                request_id=email_request_id,
-                iso8601_timestamp=email_date,
-                bok_link=link_str,
-                image_path=image_link_str,
-                email_link=EMAIL_LINK_TEMPLATE.format(email_filename=email_filename)
-            )
-
-        logging.debug("Creating email")
-        message = Message(account=account,
-                          body=HTMLBody(message_body),
-                          subject=email_subject,
-                          to_recipients=[email for _, email in recipients],
-                          reply_to=DS_REPLY_TO)
-        logging.debug(f"{message.to_recipients=}")
-        logging.debug(f"{message.subject=}")
-
-        # Attaching logo
-        logo_path = RESOURCES_PATH / CITY_LOGO_FILENAME
-        message.attach(_get_image_attachment(logo_path, CITY_LOGO_FILENAME))
-
-        # Attaching area image
-        if image_link_str:
-            with tempfile.NamedTemporaryFile("wb") as image_temp_file:
-                image_temp_file.write(http_session.get(image_link_str,
-                                                       proxies={'http': None, 'https': None}).content)
-                image_temp_file.flush()
-
-                message.attach(_get_image_attachment(pathlib.Path(image_temp_file.name).absolute(),
-                                                     AREA_IMAGE_FILENAME))
-
-        logging.debug("Sending email")
+@functools.lru_cache(maxsize=1)
+def _get_email_env() -> jinja2.Environment:
+    # NB autoescape is left off - the template injects <br> tags into the post text
+    return jinja2.Environment(loader=jinja2.FileSystemLoader(RESOURCES_PATH), autoescape=False, auto_reload=False)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_email_template() -> jinja2.Template:
+    return _get_email_env().get_template(ALERT_EMAIL_TEMPLATE)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_logo_attachment() -> FileAttachment:
+    # the logo is the same in every email, so it is only read once
+    return FileAttachment(name=CITY_LOGO_FILENAME,
+                          content=(RESOURCES_PATH / CITY_LOGO_FILENAME).read_bytes(),
+                          is_inline=True)
+
+
+@functools.lru_cache(maxsize=4096)
+def _fetch_area_image(image_filename: str, http_session: requests.Session) -> bytes:
+    # the same area images turn up across many configs, so only fetching each one once
+    image_response = http_session.get(IMAGE_LINK_TEMPLATE.format(image_filename=image_filename),
+                                      proxies={'http': None, 'https': None}, timeout=IMAGE_FETCH_TIMEOUT)
+    image_response.raise_for_status()
+
+    return image_response.content
+
+
+def _make_area_attachment(content: bytes) -> FileAttachment:
+    # NB not cached - the image bytes already are, and each email gets its own attachment
+    return FileAttachment(name=AREA_IMAGE_FILENAME, content=content, is_inline=True)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_secrets() -> typing.Dict:
+    return secrets_utils.get_secrets()
+
+
+def _empty_field_mask(alert_df: pandas.DataFrame) -> pandas.DataFrame:
+    # null values, or collections with nothing but null values in them, are treated as empty. Only object columns can
+    # hold collections, so the rest are checked in one go
+    return alert_df.apply(
+        lambda col: col.map(
+            lambda v: all(map(pandas.isna, v)) if isinstance(v, typing.Collection) else pandas.isna(v)
+        ) if col.dtype == object else col.isna()
+    )
+
+
+def _form_alerts_email(alert_dict: typing.Dict[str, typing.Any],
+                       email_focus: str,
+                       email_filename: str,
+                       recipients: typing.Tuple[typing.Tuple[str, str]],
+                       account: Account,
+                       http_session: requests.Session) -> typing.Tuple[Message, str]:
+    # Forming email message
+    if alert_dict.get("status", "Open")  == "Open":
+        email_subject = f"Service Alert - {alert_dict.get('title')} in {alert_dict.get('area')}"
+    else:
+        email_subject = f"Updated Service Alert - {alert_dict.get('title')} in {alert_dict.get('area')}"
+
+    email_request_id = str(uuid.uuid4())
+    email_date = pandas.Timestamp.now().isoformat()
+    suggested_post = alert_dict.get(TWEET_COL)
+    link_str = LINK_TEMPLATE.format(alert_id=alert_dict[ID_COL])
+    image_filename = alert_dict.get(IMAGE_COL)
+    image_link_str = (
+        IMAGE_LINK_TEMPLATE.format(image_filename=image_filename)
+        if image_filename is not None
+        else None
+    )
+
+    # leaving out tweet col for email generation (NB null fields have already been left out)
+    excluded_fields = {TWEET_COL, IMAGE_COL}
+
+    if alert_dict.get("area_type") == "Official Planning Suburb":
+        excluded_fields |= {"inferred_suburbs"}
+    elif alert_dict.get("area_type") == "Citywide":
+        excluded_fields |= {"inferred_suburbs", "inferred_wards"}
+
+    # formatting array fields
+    alert_dict = {
+        k: ", ".join(v) if isinstance(v, typing.Collection) and not isinstance(v, str) else v
+        for k, v in alert_dict.items()
+        if k not in excluded_fields
+    }
+
+    logging.debug(f"{email_subject=}, {email_request_id=}, {email_date=}")
+
+    logging.debug("Forming email body")
+    message_body = _get_email_template().render(
+        email_subject=email_subject,
+        recipients=[name for name, _ in recipients if name],
+        alert_dict=alert_dict,
+        post_text=suggested_post,
+        email_focus=email_focus,
+        request_id=email_request_id,
+        iso8601_timestamp=email_date,
+        bok_link=link_str,
+        image_path=image_link_str,
+        email_link=EMAIL_LINK_TEMPLATE.format(email_filename=email_filename)
+    )
+
+    logging.debug("Creating email")
+    message = Message(account=account,
+                      body=HTMLBody(message_body),
+                      subject=email_subject,
+                      to_recipients=[email for _, email in recipients],
+                      reply_to=DS_REPLY_TO)
+    logging.debug(f"{message.to_recipients=}")
+    logging.debug(f"{message.subject=}")
+
+    # Attaching logo
+    message.attach(_get_logo_attachment())
+
+    # Attaching area image
+    # NB a missing image shouldn't stop the alert going out, so the email is sent without it
+    if image_link_str:
+        try:
+            message.attach(_make_area_attachment(_fetch_area_image(image_filename, http_session)))
+        except requests.RequestException as e:
+            logging.warning(f"Failed to fetch area image for {email_filename} - {e.__class__.__name__}: '{e}'")
+
+    return message, message_body
+
+
+def _send_message(message: Message) -> Exception or None:
+    # NB returns any failure, like bulk_create does, rather than raising it
+    try:
         message.send()
+    except Exception as e:
+        return e
 
-        return message_body
+    return None
 
 
 class ServiceAlertEmailer(ServiceAlertBroadcaster):
     def __init__(self, minio_write_name=SA_EMAIL_NAME):
-        super().__init__(minio_write_name=minio_write_name)
-
-    def send_alert_emails(self):
-        with proxy_utils.setup_http_session() as http:
-            for config, (_, alert_df) in zip(SA_EMAIL_CONFIGS,
-                                             self._service_alerts_generator(SA_EMAIL_CONFIGS)):
-                config_hash = hashlib.sha256(str.encode(str(config.receivers) +
-                                                        str(config.email_focus))).hexdigest()
-                if alert_df.empty:
-                    logging.warning(f"Nothing more to do for {config=}, skipping!")
+        # only reading what the emails need (plus the expiry date, for the time window filtering), so that the
+        # per-config filtering and copying only touches these columns. NB the ID comes back as the index
+        super().__init__(minio_write_name=minio_write_name,
+                         columns=[col for col in EMAIL_COLS if col != ID_COL] + [EXPIRY_COL])
+
+        self.data = self.data[[*EMAIL_COLS, EXPIRY_COL]].assign(
+            # there are only a handful of service areas, so comparisons against them are cheaper as categories
+            service_area=lambda df: df["service_area"].astype("category")
+        )
+        # NB the index is over all of the data, and the config filtering preserves the index, so it can be shared by
+        #    every config
+        self.ward_index = _precompute_ward_index(self.data)
+
+    def _unsent_alerts_generator(self, config: ServiceAlertEmailConfig,
+                                 alert_df: pandas.DataFrame) -> typing.Iterator[typing.Tuple[str, typing.Dict]]:
+        config_hash = config.config_hash
+        empty_field_mask = _empty_field_mask(alert_df)
+
+        for alert_record, empty_field_row in zip(alert_df.to_dict(orient="records"), empty_field_mask.to_numpy()):
+            # only keeping the fields with something in them
+            alert_dict = {
+                k: v for (k, v), empty in zip(alert_record.items(), empty_field_row) if not empty
+            }
+            legacy_email_filename = f"{config_hash}_{alert_dict[ID_COL]}.html"
+            # new form of email filename incorporates the status
+            # NB an empty status has been left out of the alert dict, so it defaults to an empty string
+            lower_status = alert_dict.get('status', '').lower().replace(" ", "-")
+            email_filename = f"{config_hash}_{lower_status}_{alert_dict[ID_COL]}.html"
+
+            if TWEET_COL not in alert_dict:
+                logging.warning(f"Empty post - {alert_dict[ID_COL]}")
+
+            # NB only checking whether anything is listed under the email's filename, so this doesn't depend on what
+            #    the listing gives back
+            logging.debug("Checking if email has already been sent...")
+            sent_email = next(itertools.chain(
+                minio_utils.list_objects_in_bucket(self.minio_write_name,
+                                                   minio_prefix_override=email_filename),
+                minio_utils.list_objects_in_bucket(self.minio_write_name,
+                                                   minio_prefix_override=legacy_email_filename)
+            ), None)
+            if sent_email is not None:
+                logging.warning(f"Skipping {alert_dict[ID_COL]} ({sent_email}) for this config - already sent!")
+                continue
+
+            yield email_filename, alert_dict
+
+    def _backup_email(self, email_filename: str, email_message: str, backup_dir: pathlib.Path):
+        logging.debug("Backing up email")
+        # NB the email filenames are unique to each config and alert, so they can all share the run's directory
+        local_path = backup_dir / email_filename
+        with open(local_path, "w") as local_file:
+            local_file.write(email_message)
+
+        minio_utils.file_to_minio(local_path, self.minio_write_name)
+        local_path.unlink()
+
+    def _send_config_alert_emails(self, config: ServiceAlertEmailConfig, alert_df: pandas.DataFrame,
+                                  account: Account, http_session: requests.Session,
+                                  alert_executor: concurrent.futures.Executor, backup_dir: pathlib.Path):
+        if alert_df.empty:
+            logging.warning(f"Nothing more to do for {config=}, skipping!")
+            return
+
+        alert_df = config.apply_additional_filter(alert_df, self.ward_index)
+        if alert_df.empty:
+            logging.debug(f"Nothing left after additional filter for {config.email_focus=}, skipping")
+            return
+
+        def _form_unsent_alert_email(unsent_alert: typing.Tuple[str, typing.Dict]):
+            email_filename, alert_dict = unsent_alert
+            try:
+                return (email_filename,
+                        *_form_alerts_email(alert_dict, config.email_focus, email_filename, config.receivers,
+                                            account, http_session))
+            except Exception as e:
+                # not failing the whole batch, this alert will be tried again on the next run
+                logging.error(f"Failed to form {email_filename} - {e.__class__.__name__}: '{e}'")
+                return None
+
+        # emails are formed, sent in a single request to Exchange, and then backed up, a batch at a time, so only one
+        # batch is held in memory at a time
+        unsent_alerts = self._unsent_alerts_generator(config, alert_df)
+        while True:
+            unsent_batch = list(itertools.islice(unsent_alerts, EMAIL_BATCH_SIZE))
+            if not unsent_batch:
+                break
+
+            # forming the emails involves fetching the area images, so the alerts in a batch are formed concurrently
+            email_batch = [
+                email for email in alert_executor.map(_form_unsent_alert_email, unsent_batch)
+                if email is not None
+            ]
+            if not email_batch:
+                continue
+
+            logging.debug(f"Sending {len(email_batch)} emails")
+            if account.version.build >= EXCHANGE_2013:
+                send_results = account.bulk_create(folder=account.sent,
+                                                   items=[message for _, message, _ in email_batch],
+                                                   message_disposition=SEND_AND_SAVE_COPY)
+            else:
+                # NB servers older than Exchange 2013 can't send attachments in the same request that creates the
+                #    message, which Message.send works around by saving it first, so each message is sent on its own
+                send_results = [_send_message(message) for _, message, _ in email_batch]
+
+            backup_futures = []
+            for (email_filename, _, email_message), send_result in zip(email_batch, send_results):
+                if isinstance(send_result, Exception):
+                    # not backing up, so that it gets tried again on the next run
+                    logging.error(f"Failed to send {email_filename} - "
+                                  f"{send_result.__class__.__name__}: '{send_result}'")
                     continue
 
-                alert_df = config.apply_additional_filter(alert_df)
-
-                for alert_dict in alert_df.to_dict(orient="records"):
-                    legacy_email_filename = f"{config_hash}_{alert_dict[ID_COL]}.html"
-                    # new form of email filename incorporates the status
-                    lower_status = alert_dict['status'].lower().replace(" ", "-")
-                    email_filename = f"{config_hash}_{lower_status}_{alert_dict[ID_COL]}.html"
-
-                    if alert_dict[TWEET_COL] is None:
-                        logging.warning(f"Empty post - {alert_dict[ID_COL]}")
-
-                    logging.debug("Checking if email has already been sent...")
-                    skip_flag = False
-                    for fn in itertools.chain(
-                            minio_utils.list_objects_in_bucket(self.minio_write_name,
-                                                               minio_prefix_override=email_filename),
-                            minio_utils.list_objects_in_bucket(self.minio_write_name,
-                                                               minio_prefix_override=legacy_email_filename)
-                    ):
-                        logging.warning(f"Skipping {alert_dict[ID_COL]} ({fn}) for this config - already sent!")
-                        skip_flag = True
-                        break
-
-                    if skip_flag:
-                        continue
-
-                    email_message = _form_and_send_alerts_email(alert_dict, config.email_focus, email_filename,
-                                                                config.receivers,
-                                                                http)
-
-                    logging.debug("Backing up email")
-                    with tempfile.TemporaryDirectory() as tempdir:
-                        local_path = pathlib.Path(tempdir) / email_filename
-                        with open(local_path, "w") as local_file:
-                            local_file.write(email_message)
-
-                        minio_utils.file_to_minio(local_path, self.minio_write_name)
+                backup_futures += [alert_executor.submit(self._backup_email,
+                                                        email_filename, email_message, backup_dir)]
+
+            # waiting for the batch's backups, so that any failures are raised here
+            for backup_future in backup_futures:
+                backup_future.result()
+
+    def send_alert_emails(self):
+        # the configs only cover a couple of time window and planned combinations, so each of those is filtered once,
+        # and then shared by all of the configs that use it
+        partition_configs = {
+            _partition_key(config): config for config in SA_EMAIL_CONFIGS
+        }
+        partition_dfs = {
+            partition: alert_df
+            for partition, (_, alert_df) in zip(partition_configs,
+                                                self._service_alerts_generator(partition_configs.values()))
+        }
+        logging.debug(f"{len(partition_dfs)=}")
+
+        # NB the proxy is set via environment variables, which are shared by all threads, so it is set once here,
+        #    around the whole pool, rather than per email
+        # NB the alert workers are separate from the config workers, so that a config waiting on its alerts can't
+        #    starve them of workers
+        # NB the context managers are torn down in reverse, so the backup directory is opened before both pools, and
+        #    the alert pool before the config pool, so that nothing still in use is torn down while a config is running
+        with proxy_utils.set_env_http_proxy(), \
+                proxy_utils.setup_http_session() as http, \
+                tempfile.TemporaryDirectory() as backup_dir, \
+                concurrent.futures.ThreadPoolExecutor(max_workers=ALERT_WORKERS) as alert_executor, \
+                concurrent.futures.ThreadPoolExecutor(max_workers=EMAIL_WORKERS) as executor:
+            # the account is set up once, and then shared by all of the workers
+            secrets = _get_secrets()
+            account = exchange_utils.setup_exchange_account(secrets["proxy"]["username"],
+                                                            secrets["proxy"]["password"], )
+
+            config_alert_dfs = (partition_dfs[_partition_key(config)] for config in SA_EMAIL_CONFIGS)
+
+            # the configs are independent of one another, so each is handled by a worker
+            send_config_alert_emails = functools.partial(self._send_config_alert_emails,
+                                                         account=account, http_session=http,
+                                                         alert_executor=alert_executor,
+                                                         backup_dir=pathlib.Path(backup_dir))
+            config_futures = {
+                executor.submit(send_config_alert_emails, config, alert_df): config
+                for config, alert_df in zip(SA_EMAIL_CONFIGS, config_alert_dfs)
+            }
+
+            # letting every config run, even if some fail, and only then raising the first failure
+            config_errors = []
+            for config_future in concurrent.futures.as_completed(config_futures):
+                try:
+                    config_future.result()
+                except Exception as e:
+                    logging.error(f"Failed to send emails for {config_futures[config_future].email_focus} to "
+                                  f"{config_futures[config_future].receivers} - {e.__class__.__name__}: '{e}'")
+                    config_errors += [e]
+
+            if config_errors:
+                raise config_errors[0]
 
 
 if __name__ == "__main__":
@@ -1,6 +1,4 @@
-from datetime import datetime
 import logging
-import re
 
 from db_utils import minio_utils
 import pandas as pd
@@ -14,19 +12,30 @@ from cct_connector import (
     FIXED_SN_MINIO_NAME
 )
 
-SN_REGEX_PATTERN = r"^\d{10}$"
-SN_RE = re.compile(SN_REGEX_PATTERN)
-HM_RE = re.compile(r'^\d{2}:\d{2}$')
+# NB these are used with fullmatch, so don't need anchors
+SN_REGEX_PATTERN = r"\d{10}"
+HM_REGEX_PATTERN = r"\d{2}:\d{2}"
 SAST_TZ = pytz.timezone('Africa/Johannesburg')
 
 
+def _parse_time(time_series: pd.Series) -> pd.Series:
+    return pd.to_datetime(
+        time_series.str.replace("60", "59", regex=False).str.replace("Select...", "00", regex=False),
+        format="%H:%M", errors="coerce"
+    )
+
+
+def _time_of_day(time_series: pd.Series) -> pd.Series:
+    return time_series - time_series.dt.normalize()
+
+
 def _clean_sa_df(data_df: pd.DataFrame) -> pd.DataFrame:
     logging.debug("Cleaning DF...")
     cleaned_df = data_df.assign(**{
         # cleaning up notification number reference
-        "notification_number": lambda df: df["Reference_x0020_No"].apply(
-            lambda val: f"{int(val):012d}" if val and SN_RE.match(val) else None
-        ),
+        "notification_number": lambda df: df["Reference_x0020_No"].where(
+            df["Reference_x0020_No"].str.fullmatch(SN_REGEX_PATTERN, na=False)
+        ).str.zfill(12),
         # turning planned vs unplanned into boolean
         "planned": lambda df: df["Planned_x0020_Unplanned"].map({"Planned": True, "Unplanned": False}),
         # converting various dates into SAST
@@ -40,51 +49,33 @@ def _clean_sa_df(data_df: pd.DataFrame) -> pd.DataFrame:
         # computing duration
         "duration": lambda df: df["expiry_date"] - df["publish_date"],
         # Munging times
-        "start_time": lambda df: df["Start_x0020_Time"].apply(
-            lambda val: datetime.strptime(val.replace("60", "59").replace("Select...","00") + "+02:00", "%H:%M%z")
-        ).dt.time,
-        "forecast_end_time": lambda df: df["Forecast_x0020_End_x0020_Time"].apply(
-            lambda val: (
-                datetime.strptime(
-                    val.replace("60", "59").replace("Select...","00") + "+02:00", "%H:%M%z"
-                ) if (pd.notna(val) and HM_RE.match(val)) else None
-            )
-        ),
+        "start_time": lambda df: _parse_time(df["Start_x0020_Time"]),
+        "forecast_end_time": lambda df: _parse_time(df["Forecast_x0020_End_x0020_Time"].where(
+            df["Forecast_x0020_End_x0020_Time"].str.fullmatch(HM_REGEX_PATTERN, na=False)
+        )),
         # Creating timestamps
-        "start_timestamp": lambda df: df.apply(
-            lambda row: datetime.combine(row["effective_date"], row["start_time"]),
-            axis=1
-        ).dt.tz_localize("+02:00"),
-        "forecast_end_timestamp": lambda df: df.apply(
-            lambda row: SAST_TZ.localize(datetime.combine(
-                # Assuming that it ends on the day of expiry
-                (row["expiry_date"] - pd.Timedelta(days=1)).date(),
-                row["forecast_end_time"].time()
-            )) if pd.notna(row['forecast_end_time']) else None,
-            axis=1
+        "start_timestamp": lambda df: (
+            df["effective_date"].dt.normalize() + _time_of_day(df["start_time"])
         ),
-        "location": lambda df: df.apply(
-            lambda row: (
-                # dropping location entry if it overlaps with the description entry
-                row["Address_x0020_Location_x0020_2"] if (
-                        row["Address_x0020_Location_x0020_2"] and
-                        row["Description12"] and
-                        row["Address_x0020_Location_x0020_2"][:len(row["Description12"])] !=
-                        row["Description12"][:len(row["Address_x0020_Location_x0020_2"])]
-                ) else
-                # Using controlled address field
-                row["All_x0020_Location_x0020_Selected"] if (
-                    row["All_x0020_Location_x0020_Selected"]
-                ) else None
-            ), axis=1
+        "forecast_end_timestamp": lambda df: (
+            # Assuming that it ends on the day of expiry
+            (df["expiry_date"] - pd.Timedelta(days=1)).dt.normalize() + _time_of_day(df["forecast_end_time"])
+        ).dt.tz_convert(SAST_TZ),
+        "location": lambda df: df["Address_x0020_Location_x0020_2"].where(
+            # dropping location entry if it overlaps with the description entry
+            pd.Series([
+                bool(address and description and address[:len(description)] != description[:len(address)])
+                for address, description in zip(df["Address_x0020_Location_x0020_2"], df["Description12"])
+            ], index=df.index, dtype=bool),
+            # Using controlled address field
+            df["All_x0020_Location_x0020_Selected"].where(
+                df["All_x0020_Location_x0020_Selected"].fillna("").astype(bool)
+            )
         )
     }).assign(**{
         # fixing cases where the start and end timestamps roll over the day
-        "forecast_end_timestamp": lambda df: df.apply(
-            lambda row: (row["forecast_end_timestamp"] + pd.Timedelta(days=(
-                1 if row["forecast_end_timestamp"] <= row["start_timestamp"] else 0
-            ))) if pd.notna(row["forecast_end_timestamp"]) else None,
-            axis=1
+        "forecast_end_timestamp": lambda df: df["forecast_end_timestamp"] + pd.to_timedelta(
+            (df["forecast_end_timestamp"] <= df["start_timestamp"]).astype(int), unit="D"
         ),
     }).rename(columns={
         "Service_x0020_Area12": "service_area",
@@ -150,12 +141,11 @@ class ServiceAlertFixer(ServiceAlertBase.ServiceAlertsBase):
         logging.debug(f"{old_data.shape=}")
 
         logging.debug(f"prior to dedup - {self.data.shape=}")
+        # only keeping the old alerts that haven't been superseded by new ones
+        keep_old = ~old_data[ID_COL].isin(self.data[ID_COL])
         self.data = pd.concat((
-            old_data, self.data
-        )).drop_duplicates(
-            subset=[ID_COL,],
-            keep='last'
-        )
+            old_data[keep_old], self.data
+        ))
         logging.debug(f"    post dedup - {self.data.shape=}")
 
 
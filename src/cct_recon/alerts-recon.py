@@ -1,16 +1,117 @@
-import copy
+import concurrent.futures
+import gzip
 import json
 
 import boto3
+import botocore.config
+
+# NB orjson and ijson aren't part of the base Lambda runtime, so falling back to the standard library if they haven't
+#    been bundled
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 PREV_SUFFIX = ".prev"
 V1_ALERTS_PREFIX = 'alerts/'
 V1_1_ALERTS_PREFIX = 'v1.1/service-alert/'
 V1_2_ALERTS_PREFIX = 'v1.2/service-alert/'
+# top-level fields left out of the older alert versions
+V1_STRIP = frozenset({'geospatial_footprint', 'area_type'})
+V1_1_STRIP = frozenset({'status'})
 SNS_ARN = "arn:aws:sns:af-south-1:566800947500:service-alerts"
+WRITE_WORKERS = 16
+# feeds bigger than this are streamed, rather than read and parsed in one go
+STREAM_THRESHOLD = 8 * 1024 * 1024
+# SNS messages are limited to 256KB, so leaving some headroom
+SNS_MESSAGE_LIMIT = 250 * 1024
+
+# NB the clients are created at import, so they (and their connections) are reused across warm invocations
+CLIENT_CONFIG = botocore.config.Config(
+    max_pool_connections=64,
+    tcp_keepalive=True,
+    retries={'max_attempts': 3, 'mode': 'standard'},
+)
+
+s3 = boto3.client('s3', config=CLIENT_CONFIG)
+sns = boto3.client('sns', config=CLIENT_CONFIG)
+
+
+def _json_loads(data):
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+def _json_dumps(obj):
+    # NB returns bytes, which is what S3 wants. Also compact, like orjson, so that the sizes line up
+    return orjson.dumps(obj) if orjson else json.dumps(obj, separators=(',', ':')).encode()
+
+
+def _iter_service_alerts(body, content_length):
+    # streaming large feeds one alert at a time if possible, so that the whole feed doesn't have to be held in memory
+    # NB use_float, as the alerts are written out again, and Decimals aren't JSON serialisable
+    if ijson and content_length > STREAM_THRESHOLD:
+        return ijson.items(body, 'item', use_float=True)
+
+    # otherwise, a single read and parse is quicker
+    return iter(_json_loads(body.read()))
+
+
+def _service_alert_objects(service_alert):
+    # NB the older versions only leave out top-level fields, and are serialised straight away, so they can share
+    #    the nested values with the original rather than deep copying them
+    # V1 alert
+    # NB not using a key set difference, as that would lose the field order
+    v1_service_alert = {
+        k: v for k, v in service_alert.items()
+        if k not in V1_STRIP
+    }
+
+    # V1.1 alert
+    v1_1_service_alert = {
+        k: v for k, v in service_alert.items()
+        if k not in V1_1_STRIP
+    }
+
+    service_alert_id = str(service_alert["Id"])
+    return (
+        (f"{V1_ALERTS_PREFIX}{service_alert_id}.json", _json_dumps(v1_service_alert)),
+        (f"{V1_1_ALERTS_PREFIX}{service_alert_id}", _json_dumps(v1_1_service_alert)),
+        # V1.2 alert
+        (f"{V1_2_ALERTS_PREFIX}{service_alert_id}", _json_dumps(service_alert)),
+    )
+
+
+def _sns_message_chunks(service_alert_ids):
+    # splitting the IDs up into lists that each serialise to within the SNS message limit
+    chunk = []
+    chunk_size = 2  # for the enclosing brackets
+    for service_alert_id in service_alert_ids:
+        id_size = len(_json_dumps(service_alert_id)) + 1  # for the separating comma
+        if chunk and chunk_size + id_size > SNS_MESSAGE_LIMIT:
+            yield chunk
+            chunk = []
+            chunk_size = 2
+
+        chunk += [service_alert_id]
+        chunk_size += id_size
+
+    if chunk:
+        yield chunk
 
-s3 = boto3.client('s3')
-sns = boto3.client('sns')
+
+def _write_alert_object(bucket_name, key, body):
+    print(f"Writing {key} to S3")
+    return s3.put_object(
+        Body=body,
+        Bucket=bucket_name,
+        Key=key,
+        ContentType='application/json'
+    )
 
 
 def lambda_handler(event, context):
@@ -21,92 +122,88 @@ def lambda_handler(event, context):
     object_name = s3_event['object']['key']
     print(f"{object_name=}")
 
-    # Fetching file from S3
-    service_alerts_response = s3.get_object(Bucket=bucket_name, Key=object_name)
-    service_alerts_data = json.load(service_alerts_response['Body'])
-
     # Fetching old data from S3
     old_object_name = object_name + PREV_SUFFIX
-    old_service_alerts_response = s3.get_object(Bucket=bucket_name, Key=old_object_name)
-    old_service_alerts_data = json.load(old_service_alerts_response['Body'])
+    try:
+        old_service_alerts_response = s3.get_object(Bucket=bucket_name, Key=old_object_name)
+        old_service_alerts_body = old_service_alerts_response['Body'].read()
+        # NB older .prev files weren't compressed
+        if old_service_alerts_response.get('ContentEncoding') == 'gzip':
+            old_service_alerts_body = gzip.decompress(old_service_alerts_body)
+        old_service_alerts_data = _json_loads(old_service_alerts_body)
+    except s3.exceptions.NoSuchKey:
+        # first run for this file, so everything is new
+        print(f"{old_object_name} not found, treating all alerts as new")
+        old_service_alerts_data = []
 
     # Creating set of old ID-Status pairs
-    old_ids = set([
-        f'{old_service_alert["Id"]}-{old_service_alert["status"]}'
+    old_ids = frozenset(
+        (old_service_alert["Id"], old_service_alert["status"])
         for old_service_alert in old_service_alerts_data
-    ])
-
-    # Creating list of new service alerts
-    new_service_alerts = [
-        service_alert
-        for service_alert in service_alerts_data
-        if f'{service_alert["Id"]}-{service_alert["status"]}' not in old_ids
-    ]
-    print(f"{len(old_ids)=}, {len(new_service_alerts)=}")
-
-    for service_alert in new_service_alerts:
-        print(f"Writing {service_alert['Id']} to S3")
-        # V1 alert
-        v1_service_alert = copy.deepcopy(service_alert)
-        del v1_service_alert['geospatial_footprint']
-        del v1_service_alert['area_type']
-
-        response = s3.put_object(
-            Body=json.dumps(v1_service_alert),
-            Bucket=bucket_name,
-            Key=V1_ALERTS_PREFIX + str(service_alert["Id"]) + ".json",
-            ContentType='application/json'
-        )
-
-        v1_1_service_alert = copy.deepcopy(service_alert)
-        del v1_1_service_alert['status']
+    )
 
-        # V1.1 alert
-        response = s3.put_object(
-            Body=json.dumps(v1_1_service_alert),
-            Bucket=bucket_name,
-            Key=V1_1_ALERTS_PREFIX + str(service_alert["Id"]),
-            ContentType='application/json'
-        )
+    # Fetching file from S3
+    service_alerts_response = s3.get_object(Bucket=bucket_name, Key=object_name)
 
-        # V1.2 alert
-        response = s3.put_object(
-            Body=json.dumps(service_alert),
+    # Going through the alerts in a single pass, writing the new ones to S3 concurrently as they're found, as each
+    # write is an independent round trip
+    current_service_alerts = []
+    new_service_alert_ids = []
+    write_futures = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=WRITE_WORKERS) as executor:
+        for service_alert in _iter_service_alerts(service_alerts_response['Body'],
+                                                  service_alerts_response['ContentLength']):
+            # Creating stripped down version of service alerts list for dedupping
+            current_service_alerts += [{"Id": service_alert["Id"], "status": service_alert["status"]}]
+
+            if (service_alert["Id"], service_alert["status"]) in old_ids:
+                continue
+
+            new_service_alert_ids += [{"Id": service_alert["Id"]}]
+            write_futures += [
+                executor.submit(_write_alert_object, bucket_name, key, body)
+                for key, body in _service_alert_objects(service_alert)
+            ]
+
+    # raising any write errors
+    for write_future in write_futures:
+        write_future.result()
+
+    print(f"{len(old_ids)=}, {len(new_service_alert_ids)=}")
+
+    # Publishing new service alerts to SNS, in as many messages as it takes to stay under the size limit
+    with concurrent.futures.ThreadPoolExecutor(max_workers=WRITE_WORKERS) as executor:
+        publish_futures = [
+            executor.submit(
+                sns.publish,
+                TopicArn=SNS_ARN,
+                Subject=f"New or updated Service Alerts!",
+                Message=_json_dumps(new_service_alert_ids_chunk).decode()
+            )
+            for new_service_alert_ids_chunk in _sns_message_chunks(new_service_alert_ids)
+        ]
+    print(f"Published {len(publish_futures)} message(s) to SNS")
+
+    # raising any publish errors
+    for publish_future in publish_futures:
+        publish_future.result()
+
+    current_service_alerts_json = _json_dumps(current_service_alerts)
+
+    # Writing back to S3 bucket, if anything has changed since the last run
+    if current_service_alerts != old_service_alerts_data:
+        # NB mtime is fixed, so that the same alerts always compress to the same bytes
+        s3.put_object(
+            Body=gzip.compress(current_service_alerts_json, compresslevel=1, mtime=0),
             Bucket=bucket_name,
-            Key=V1_2_ALERTS_PREFIX + str(service_alert["Id"]),
-            ContentType='application/json'
-        )
-
-    new_service_alert_ids = [
-        {"Id": service_alert["Id"]}
-        for service_alert in new_service_alerts
-    ]
-
-    # Publishing new service alerts to SNS
-    if len(new_service_alert_ids):
-        print("Publishing to SNS!")
-        response = sns.publish(
-            TopicArn=SNS_ARN,
-            Subject=f"New or updated Service Alerts!",
-            Message=json.dumps(new_service_alert_ids)
+            Key=object_name + PREV_SUFFIX,
+            ContentType='application/json',
+            ContentEncoding='gzip'
         )
-
-    # Creating stripped down version of service alerts list for dedupping
-    current_service_alerts = [
-        {"Id": service_alert["Id"], "status": service_alert["status"]}
-        for service_alert in service_alerts_data
-    ]
-    current_service_alerts_json = json.dumps(current_service_alerts)
-
-    # Writing back to S3 bucket
-    s3.put_object(
-        Body=current_service_alerts_json,
-        Bucket=bucket_name,
-        Key=object_name + PREV_SUFFIX,
-        ContentType='application/json'
-    )
+    else:
+        print(f"{old_object_name} is unchanged, not rewriting it")
 
     return {
         'statusCode': 200,
-        'body': current_service_alerts_json
+        'body': current_service_alerts_json.decode()
     }
@@ -12,23 +12,30 @@ with kubernetes_dag.airflowK8sDAG("service-alerts-pipeline",
                                   start_date=DAG_STARTDATE, schedule_interval=timedelta(minutes=10),
                                   code_location='https://lake.capetown.gov.za/service-alerts-connector.deploy/service-alerts-connector.zip',
                                   install_gs_utils=True,
-                                  concurrency=2) as dag:
+                                  concurrency=2, max_active_runs=2) as dag:
     # Operators
+    # NB task_concurrency stops overlapping runs from running the same step twice at once, e.g. hitting the upstream
+    #    API with two fetches
     fetch_data_operator = dag.get_dag_operator("fetch-service-alerts",
                                                "python3 cct_connector/ServiceAlertConnector.py",
-                                               resources=kubernetes_dag.LIGHT_RESOURCES)
+                                               resources=kubernetes_dag.LIGHT_RESOURCES,
+                                               task_concurrency=1)
     fix_data_operator = dag.get_dag_operator("fix-service-alerts",
                                              "python3 cct_connector/ServiceAlertFixer.py",
-                                             resources=kubernetes_dag.LIGHT_RESOURCES)
+                                             resources=kubernetes_dag.LIGHT_RESOURCES,
+                                             task_concurrency=1)
     augment_data_operator = dag.get_dag_operator("augment-service-alerts",
                                                  "python3 cct_connector/ServiceAlertAugmenter.py",
-                                                 resources=kubernetes_dag.LIGHT_RESOURCES)
+                                                 resources=kubernetes_dag.LIGHT_RESOURCES,
+                                                 task_concurrency=1)
     broadcast_data_operator = dag.get_dag_operator("broadcast-service-alerts",
                                                    "python3 cct_connector/ServiceAlertBroadcaster.py",
-                                                   resources=kubernetes_dag.LIGHT_RESOURCES)
+                                                   resources=kubernetes_dag.LIGHT_RESOURCES,
+                                                   task_concurrency=1)
     email_data_operator = dag.get_dag_operator("email-service-alerts",
                                                "python3 cct_connector/ServiceAlertEmailer.py",
-                                               resources=kubernetes_dag.LIGHT_RESOURCES)
+                                               resources=kubernetes_dag.LIGHT_RESOURCES,
+                                               task_concurrency=1)
 
     # Dependencies
     fetch_data_operator >> fix_data_operator >> augment_data_operator >> (broadcast_data_operator, email_data_operator)